@@ -1,6 +1,7 @@
+import io
 import streamlit as st
 import pandas as pd
-from config.settings import PAGE_CONFIG, APP_NAME, APP_VERSION, GEMINI_API_KEY
+from config.settings import PAGE_CONFIG, APP_NAME, APP_VERSION, GEMINI_API_KEY, DEFAULT_MODELS
 from utils.parser import MpesaParser
 from utils.analyzer import ExpenseAnalyzer
 from utils.visualizations import Charts
@@ -21,6 +22,31 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_data(show_spinner=False)
+def _load(file_bytes: bytes, file_type: str) -> pd.DataFrame:
+    """Parses the statement, memoized on file contents across reruns."""
+    return MpesaParser.parse_file(io.BytesIO(file_bytes), file_type)
+
+@st.cache_data(show_spinner=False)
+def _filter_by_date(df: pd.DataFrame, start_date, end_date) -> pd.DataFrame:
+    """Returns transactions within the selected date range."""
+    mask = ((df['_Date'] >= start_date) & (df['_Date'] <= end_date)).fillna(False)
+    return df.loc[mask]
+
+# Memoized analysis & chart builders, so tab switches / searches don't recompute
+# unchanged results. Streamlit keys these on the content hash of their arguments.
+# Wrapped here so analyzer/visualizations stay Streamlit-free; ai_insights caches
+# its own Gemini calls (model list, insights) with st.cache_data directly.
+_cached = st.cache_data(show_spinner=False)
+calculate_kpis = _cached(ExpenseAnalyzer.calculate_kpis)
+get_category_breakdown = _cached(ExpenseAnalyzer.get_category_breakdown)
+get_monthly_trends = _cached(ExpenseAnalyzer.get_monthly_trends)
+get_top_merchants = _cached(ExpenseAnalyzer.get_top_merchants)
+get_income_expense_pie = _cached(Charts.get_income_expense_pie)
+get_category_bar = _cached(Charts.get_category_bar)
+get_monthly_trend_line = _cached(Charts.get_monthly_trend_line)
+get_daily_activity_heatmap = _cached(Charts.get_daily_activity_heatmap)
+
 def main():
     st.title(f"📊 {APP_NAME} v{APP_VERSION}")
     
@@ -36,42 +62,49 @@ def main():
         
         # Model Selection
         if api_key_input:
-            with st.spinner("Loading models..."):
-                available_models = FinancialAdvisor.list_available_models(api_key_input)
+            # Offer the known catalog by default; only query the API when asked to.
+            # An invalid key surfaces when generating insights.
+            if st.button("Refresh model list"):
+                # Bypass the 5-minute cache so a refresh really re-queries the API
+                FinancialAdvisor.list_available_models.clear()
+                with st.spinner("Loading models..."):
+                    refreshed_models = FinancialAdvisor.list_available_models(api_key_input)
+                if refreshed_models:
+                    st.session_state.available_models = (api_key_input, refreshed_models)
+                else:
+                    st.error("Invalid API Key or no available models found.")
             
-            if available_models:
-                # Default to gemini-2.0-flash if available, else first one
-                default_ix = 0
-                if 'gemini-2.0-flash' in available_models:
-                    default_ix = available_models.index('gemini-2.0-flash')
-                elif 'gemini-1.5-flash' in available_models:
-                    default_ix = available_models.index('gemini-1.5-flash')
-                    
-                model_name = st.selectbox("Select Model", available_models, index=default_ix)
-            else:
-                st.error("Invalid API Key or no available models found.")
-                model_name = "gemini-2.0-flash" # Fallback
+            # A fetched list only applies to the key it was fetched with
+            models_key, fetched_models = st.session_state.get('available_models', (None, None))
+            available_models = fetched_models if models_key == api_key_input else DEFAULT_MODELS
+            
+            # Default to gemini-2.0-flash if available, else first one
+            default_ix = 0
+            if 'gemini-2.0-flash' in available_models:
+                default_ix = available_models.index('gemini-2.0-flash')
+            elif 'gemini-1.5-flash' in available_models:
+                default_ix = available_models.index('gemini-1.5-flash')
+                
+            model_name = st.selectbox("Select Model", available_models, index=default_ix)
         else:
             model_name = "gemini-2.0-flash"
 
     # -- Processing --
+    df = None
     if uploaded_file is not None:
         try:
-            # Check if file has changed
-            if st.session_state.get('last_uploaded') != uploaded_file.name:
-                with st.spinner("Parsing statement..."):
-                    file_type = uploaded_file.name.split('.')[-1]
-                    df = MpesaParser.parse_file(uploaded_file, file_type)
-                    st.session_state.data = df
-                    st.session_state.last_uploaded = uploaded_file.name
-                    st.toast("Statement loaded successfully!", icon="✅")
+            with st.spinner("Parsing statement..."):
+                file_type = uploaded_file.name.split('.')[-1]
+                df = _load(uploaded_file.getvalue(), file_type)
+            if st.session_state.get('last_toast') != uploaded_file.file_id:
+                st.session_state.last_toast = uploaded_file.file_id
+                st.toast("Statement loaded successfully!", icon="✅")
         except Exception as e:
             st.error(f"Error parsing file: {e}")
             return
 
     # -- Main Dashboard --
-    if st.session_state.data is not None:
-        df = st.session_state.data
+    if df is not None:
         
         # Date Filter
         min_date = df['Completion Time'].min().date()
@@ -84,8 +117,7 @@ def main():
             end_date = st.date_input("End Date", max_date)
             
         # Filter Data
-        mask = (df['Completion Time'].dt.date >= start_date) & (df['Completion Time'].dt.date <= end_date)
-        filtered_df = df.loc[mask]
+        filtered_df = _filter_by_date(df, start_date, end_date)
         
         if filtered_df.empty:
             st.warning("No transactions found in selected date range.")
@@ -98,7 +130,7 @@ def main():
             st.subheader("Financial Overview")
             
             # KPIs
-            kpis = ExpenseAnalyzer.calculate_kpis(filtered_df)
+            kpis = calculate_kpis(filtered_df)
             
             k1, k2, k3, k4 = st.columns(4)
             k1.metric("Total Income", f"KES {kpis['total_income']:,.2f}", delta_color="normal")
@@ -111,39 +143,43 @@ def main():
             # Charts
             c1, c2 = st.columns(2)
             with c1:
-                st.plotly_chart(Charts.get_income_expense_pie(kpis), use_container_width=True)
+                st.plotly_chart(get_income_expense_pie(kpis), use_container_width=True, key='overview_pie')
             with c2:
-                monthly_trends = ExpenseAnalyzer.get_monthly_trends(filtered_df)
-                st.plotly_chart(Charts.get_monthly_trend_line(monthly_trends), use_container_width=True)
+                monthly_trends = get_monthly_trends(filtered_df)
+                st.plotly_chart(get_monthly_trend_line(monthly_trends), use_container_width=True, key='overview_trend')
                 
         with tab2:
             st.subheader("Spending Analysis")
             
             # Category Breakdown
-            cat_df = ExpenseAnalyzer.get_category_breakdown(filtered_df, transaction_type='Expense')
+            cat_df = get_category_breakdown(filtered_df, transaction_type='Expense')
             
             c1, c2 = st.columns([2, 1])
             with c1:
-                st.plotly_chart(Charts.get_category_bar(cat_df), use_container_width=True)
+                st.plotly_chart(get_category_bar(cat_df), use_container_width=True, key='spending_category_bar')
             with c2:
                 st.markdown("### Top Expense Categories")
                 st.dataframe(cat_df, hide_index=True)
                 
             st.divider()
             st.subheader("Transaction Activity Heatmap")
-            st.plotly_chart(Charts.get_daily_activity_heatmap(filtered_df), use_container_width=True)
+            st.plotly_chart(get_daily_activity_heatmap(filtered_df), use_container_width=True, key='spending_heatmap')
             
         with tab3:
             st.subheader("Transaction History")
             
             search_term = st.text_input("Search Transactions", placeholder="Enter name, receipt no, etc.")
             
-            display_df = filtered_df.copy()
+            display_df = filtered_df
             if search_term:
-                display_df = display_df[
-                    display_df['Details'].astype(str).str.contains(search_term, case=False) |
-                    display_df['Receipt No.'].astype(str).str.contains(search_term, case=False)
-                ]
+                mask = (
+                    display_df['Details'].str.contains(search_term, case=False, regex=False, na=False) |
+                    display_df['Receipt No.'].str.contains(search_term, case=False, regex=False, na=False)
+                )
+                display_df = display_df.loc[mask]
+                
+            # Hide parser-internal helper columns (e.g. '_Date') from the table/export
+            display_df = display_df[[c for c in display_df.columns if not c.startswith('_')]]
                 
             st.dataframe(
                 display_df.sort_values('Completion Time', ascending=False),
@@ -167,7 +203,7 @@ def main():
                     
                     # Prepare data summary
                     kpis_clean = {k: float(v) for k, v in kpis.items()}
-                    top_cats = ExpenseAnalyzer.get_category_breakdown(filtered_df)
+                    top_cats = get_category_breakdown(filtered_df)
                     
                     insight = advisor.generate_insights(kpis_clean, top_cats)
                     st.markdown(insight)
@@ -17,6 +17,14 @@ PAGE_CONFIG = {
 # API Configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 
+# Known Gemini models offered before (or instead of) fetching the live list
+DEFAULT_MODELS = [
+    "gemini-2.0-flash",
+    "gemini-1.5-flash",
+    "gemini-1.5-pro",
+    "gemini-2.0-pro"
+]
+
 # Transaction Categories
 CATEGORIES = [
     "Sent to M-Pesa",
@@ -1,6 +1,7 @@
 import pytest
 import pandas as pd
 from io import BytesIO
+import utils.parser as parser_module
 from utils.parser import MpesaParser
 
 def test_parse_csv_valid():
@@ -24,7 +25,115 @@ RC12346,2023-10-02 12:00:00,Received for Art,Completed,2000.00,,3000.00
     assert df.iloc[1]['Amount'] == 2000.00
     assert df.iloc[0]['Category'] == 'Buy Goods'
 
+def test_parse_csv_with_metadata_rows():
+    csv_data = """M-PESA STATEMENT,,,,,,
+Customer Name,John Doe,,,,,
+Receipt No.,Completion Time,Details,Transaction Status,Paid In,Withdrawn,Balance
+RC12345,2023-10-01 10:00:00,Buy Goods Store X,Completed,,"1,500.00",1000.00
+"""
+    df = MpesaParser.parse_csv(BytesIO(csv_data.encode('utf-8')))
+    
+    assert len(df) == 1
+    assert df.iloc[0]['Receipt No.'] == 'RC12345'
+    assert df.iloc[0]['Amount'] == -1500.00
+
+def test_clean_currency_arrow_fast_path(monkeypatch):
+    # Every cell parses in Arrow, so pandas' coercing fallback must not be needed
+    def no_fallback(*args, **kwargs):
+        raise AssertionError("fallback used")
+    monkeypatch.setattr(parser_module.pd, 'to_numeric', no_fallback)
+    
+    col = pd.Series(["1,500.00", "", None, "-300"], index=[3, 4, 5, 6])
+    result = MpesaParser._clean_currency(col)
+    
+    assert result.tolist() == [1500.0, 0.0, 0.0, 300.0]
+    assert result.index.tolist() == [3, 4, 5, 6]
+
+def test_clean_currency_mixed_column_fallback():
+    # 'abc' and the trailing newline make the Arrow cast fail; result matches the old per-cell cleaner
+    col = pd.Series(["1,500.00", "", None, "abc", "500\n", "-300"], index=[3, 4, 5, 6, 7, 8])
+    result = MpesaParser._clean_currency(col)
+    
+    assert result.tolist() == [1500.0, 0.0, 0.0, 0.0, 500.0, 300.0]
+    assert result.index.tolist() == [3, 4, 5, 6, 7, 8]
+    assert result.dtype == 'float64'
+
 def test_categorization():
     assert MpesaParser._categorize_transaction("Pay Bill via 12345") == "Pay Bill"
     assert MpesaParser._categorize_transaction("Sent to 0712...") == "Sent to M-Pesa"
     assert MpesaParser._categorize_transaction("Funds Received from ...") == "Received M-Pesa"
+    # Rule order wins over position in the text
+    assert MpesaParser._categorize_transaction("Customer Transfer for Airtime") == "Airtime"
+    assert MpesaParser._categorize_transaction("Unknown") == "Other"
+
+def test_categorize_series_matches_scalar():
+    details = pd.Series(["Airtime Purchase", "PayBill Online", "Customer Transfer to X",
+                         "Fuliza M-Pesa", "Agent Withdraw", "Something else", None])
+    expected = [MpesaParser._categorize_transaction(d) for d in details]
+    assert MpesaParser._categorize_series(details).tolist() == expected
+
+class _FakePDF:
+    """Stands in for pdfplumber.open(); each page is just its index."""
+    def __init__(self, n_pages):
+        self.pages = list(range(n_pages))
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+class _SerialExecutor:
+    """Runs ProcessPoolExecutor (initializer + map) in-process so patches apply."""
+    instances = []
+    def __init__(self, initializer=None, initargs=(), **kwargs):
+        self.kwargs = kwargs
+        self.initargs = initargs
+        initializer(*initargs)
+        _SerialExecutor.instances.append(self)
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def map(self, fn, *iterables, chunksize=1):
+        return map(fn, *iterables)
+
+def _fake_extract_tables(page):
+    return [pd.DataFrame({
+        'Receipt No.': [f'RC{page:02d}0001', f'RC{page:02d}0002'],
+        'Completion Time': ['2023-10-01 10:00:00', '2023-10-01 11:00:00'],
+        'Details': ['Airtime Purchase', 'Pay Bill to X'],
+        'Transaction Status': ['Completed', 'Completed'],
+        'Paid In': ['', '1,000.00'],
+        'Withdrawn': ['50.00', ''],
+        'Balance': ['950.00', '1,950.00'],
+    })]
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+    _SerialExecutor.instances = []
+    monkeypatch.setattr(MpesaParser, '_extract_tables', staticmethod(_fake_extract_tables))
+    monkeypatch.setattr(parser_module, 'ProcessPoolExecutor', _SerialExecutor)
+    monkeypatch.setattr(parser_module.os, 'cpu_count', lambda: 4)
+    def use_pages(n_pages):
+        monkeypatch.setattr(parser_module.pdfplumber, 'open', lambda f: _FakePDF(n_pages))
+    return use_pages
+
+def _expected_receipts(n_pages):
+    return [f'RC{p:02d}000{i}' for p in range(n_pages) for i in (1, 2)]
+
+def test_parse_pdf_pool_flattens_pages_in_order(fake_pdf):
+    fake_pdf(24)
+    df = MpesaParser.parse_pdf(BytesIO(b'%PDF'))
+    
+    assert df['Receipt No.'].tolist() == _expected_receipts(24)
+    assert df['Amount'].tolist() == [-50.0, 1000.0] * 24
+    # One worker per PDF_PAGES_PER_WORKER pages; the PDF bytes go via initargs only
+    assert len(_SerialExecutor.instances) == 1
+    assert _SerialExecutor.instances[0].kwargs['max_workers'] == 3
+    assert _SerialExecutor.instances[0].initargs == (b'%PDF',)
+
+def test_parse_pdf_small_statement_is_serial(fake_pdf):
+    fake_pdf(3)
+    df = MpesaParser.parse_pdf(BytesIO(b'%PDF'))
+    
+    assert df['Receipt No.'].tolist() == _expected_receipts(3)
+    assert _SerialExecutor.instances == []
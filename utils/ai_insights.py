@@ -1,5 +1,6 @@
 import os
 import google.generativeai as genai
+import streamlit as st
 from config.settings import GEMINI_API_KEY
 import json
 
@@ -10,13 +11,10 @@ class FinancialAdvisor:
     
     def __init__(self, api_key=None, model_name='gemini-2.0-flash'):
         self.api_key = api_key if api_key else GEMINI_API_KEY
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(model_name)
-        else:
-            self.model = None
+        self.model_name = model_name
 
     @staticmethod
+    @st.cache_data(ttl=300, show_spinner=False)
     def list_available_models(api_key):
         """
         Lists available Gemini models that support content generation.
@@ -36,7 +34,7 @@ class FinancialAdvisor:
         """
         Generates insights based on financial data.
         """
-        if not self.model:
+        if not self.api_key:
             return "⚠️ Gemini API Key not found. Please set `GEMINI_API_KEY` in your .env file to enable AI insights."
 
         # Prepare context data
@@ -45,26 +43,35 @@ class FinancialAdvisor:
             "top_spending_categories": top_categories.head(5).to_dict('records') # Take top 5
         }
         
-        # Construct Prompt
-        prompt = f"""
-        You are an expert financial advisor analyzing M-Pesa transaction data.
-        
-        Financial Summary:
-        {json.dumps(context, indent=2, default=str)}
-        
-        Please provide a professional financial assessment including:
-        1. **Spending Analysis**: A concise summary of where the money is going.
-        2. **Actionable Recommendations**: 3-5 specific tips to improve financial health or reduce expenses.
-        3. **Alerts**: Highlight any potential red flags (e.g. high spending relative to income if applicable, though looking at raw numbers).
-        4. **Commendations**: Positive habits if any.
-        
-        Format the response in clean Markdown. Keep it friendly but professional.
-        """
-        
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return _generate_content(json.dumps(context, indent=2, default=str), self.model_name, self.api_key)
         except Exception as e:
             if "429" in str(e) or "Quota exceeded" in str(e):
                 return "⏳ **Rate Limit Exceeded**: You are using the free tier of Gemini API which has strict limits. Please wait a minute and try again, or switch to a different model in the sidebar."
             return f"❌ Error generating insights: {str(e)}"
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _generate_content(context_json, model_name, api_key):
+    """
+    Asks Gemini for an assessment of the summarized data.
+    Memoized on the serialized context, so repeat requests skip the paid API call.
+    Errors raise rather than return, so they are never cached.
+    """
+    prompt = f"""
+    You are an expert financial advisor analyzing M-Pesa transaction data.
+    
+    Financial Summary:
+    {context_json}
+    
+    Please provide a professional financial assessment including:
+    1. **Spending Analysis**: A concise summary of where the money is going.
+    2. **Actionable Recommendations**: 3-5 specific tips to improve financial health or reduce expenses.
+    3. **Alerts**: Highlight any potential red flags (e.g. high spending relative to income if applicable, though looking at raw numbers).
+    4. **Commendations**: Positive habits if any.
+    
+    Format the response in clean Markdown. Keep it friendly but professional.
+    """
+    
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name).generate_content(prompt).text
@@ -10,23 +10,19 @@ class ExpenseAnalyzer:
         """
         Calculates Key Performance Indicators.
         """
-        # Income: Positive amounts
-        incident_in = df[df['Amount'] > 0]['Amount'].sum()
-        
-        # Expenses: Negative amounts (sum is negative, so we abs it for display usually, 
-        # but here we might want to keep native or return abs. Let's return abs for 'Total Expenses')
-        incident_out = df[df['Amount'] < 0]['Amount'].sum()
+        amt = df['Amount'].to_numpy()
         
-        # Net Savings / Balance Flow
-        net = incident_in + incident_out # out is negative
+        # Income: Positive amounts
+        incident_in = amt.clip(min=0).sum()
         
-        count = len(df)
+        # Expenses: Negative amounts (sum is negative, so we abs it for 'Total Expenses')
+        incident_out = amt.clip(max=0).sum()
         
         return {
-            "total_income": incident_in,
-            "total_expenses": abs(incident_out),
-            "net_savings": net,
-            "transaction_count": count
+            "total_income": float(incident_in),
+            "total_expenses": float(abs(incident_out)),
+            "net_savings": float(amt.sum()),
+            "transaction_count": int(amt.size)
         }
     
     @staticmethod
@@ -38,31 +34,34 @@ class ExpenseAnalyzer:
         """
         if transaction_type == 'Expense':
             # Filter for expenses (negative amount)
-            filtered = df[df['Amount'] < 0].copy()
-            filtered['Amount'] = filtered['Amount'].abs()
+            filtered = df.loc[df['Amount'] < 0, ['Category', 'Amount']]
+            filtered = filtered.assign(Amount=filtered['Amount'].abs())
         else:
             # Filter for income
-            filtered = df[df['Amount'] > 0].copy()
+            filtered = df.loc[df['Amount'] > 0, ['Category', 'Amount']]
             
-        return filtered.groupby('Category')['Amount'].sum().reset_index().sort_values('Amount', ascending=False)
+        return filtered.groupby('Category', observed=True)['Amount'].sum().reset_index().sort_values('Amount', ascending=False)
         
     @staticmethod
     def get_monthly_trends(df):
         """
         Resamples data by month for Income and Expense.
         """
-        # Ensure we have datetime index or column
-        df = df.copy()
-        if not pd.api.types.is_datetime64_any_dtype(df['Completion Time']):
-             df['Completion Time'] = pd.to_datetime(df['Completion Time'])
-             
-        df.set_index('Completion Time', inplace=True)
+        # Ensure we have a datetime column, converting only when needed
+        times = df['Completion Time']
+        if not pd.api.types.is_datetime64_any_dtype(times):
+             times = pd.to_datetime(times)
+        
+        # Index just the Amount values by time rather than copying the whole frame
+        amt = pd.Series(df['Amount'].to_numpy(), index=pd.DatetimeIndex(times, name='Completion Time'))
         
-        # Resample
-        monthly = df.resample('M')['Amount'].agg(
-            Income=lambda x: x[x > 0].sum(),
-            Expense=lambda x: abs(x[x < 0].sum())
-        ).reset_index()
+        # Split into income/expense once, then resample with built-in sums
+        pos = amt.clip(lower=0)
+        neg = (-amt).clip(lower=0)
+        monthly = pd.concat([
+            pos.resample('ME').sum().rename('Income'),
+            neg.resample('ME').sum().rename('Expense')
+        ], axis=1).reset_index()
         
         # Format month name
         monthly['Month'] = monthly['Completion Time'].dt.strftime('%b %Y')
@@ -77,8 +76,8 @@ class ExpenseAnalyzer:
         but extracting exact name is hard without complex regex.
         We'll use 'Details' column directly for now.
         """
-        expenses = df[df['Amount'] < 0].copy()
-        expenses['Amount'] = expenses['Amount'].abs()
+        expenses = df.loc[df['Amount'] < 0, ['Details', 'Amount']]
+        expenses = expenses.assign(Amount=expenses['Amount'].abs())
         
         # Group by Details
         return expenses.groupby('Details')['Amount'].sum().reset_index().sort_values('Amount', ascending=False).head(n)
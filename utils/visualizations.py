@@ -1,5 +1,7 @@
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly_resampler import FigureResampler
 from config.settings import THEME_COLORS
 
 class Charts:
@@ -55,28 +57,28 @@ class Charts:
         """
         Generates a line chart for monthly trends.
         """
-        fig = go.Figure()
+        # Resampler only ships the visible, LTTB-downsampled points to the browser
+        fig = FigureResampler(go.Figure(), default_n_shown_samples=1000)
+        # Plot at month start with monthly ticks so each point gets exactly one label
+        months = monthly_df['Completion Time'].dt.to_period('M').dt.to_timestamp().to_numpy()
         
-        fig.add_trace(go.Scatter(
-            x=monthly_df['Month'], 
-            y=monthly_df['Income'],
+        fig.add_trace(go.Scattergl(
             mode='lines+markers',
             name='Income',
             line=dict(color=THEME_COLORS[0], width=3)
-        ))
+        ), hf_x=months, hf_y=monthly_df['Income'].to_numpy())
         
-        fig.add_trace(go.Scatter(
-            x=monthly_df['Month'], 
-            y=monthly_df['Expense'],
+        fig.add_trace(go.Scattergl(
             mode='lines+markers',
             name='Expense',
             line=dict(color=THEME_COLORS[1], width=3)
-        ))
+        ), hf_x=months, hf_y=monthly_df['Expense'].to_numpy())
         
         fig.update_layout(
             title="Monthly Income & Expense Trends",
             xaxis_title="Month",
             yaxis_title="Amount (KES)",
+            xaxis=dict(dtick="M1", tickformat="%b %Y", hoverformat="%b %Y"),
             hovermode="x unified",
             margin=dict(t=30, b=0, l=0, r=0),
             legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
@@ -88,19 +90,15 @@ class Charts:
         """
         Generates a heatmap of transaction activity by Day of Week and Hour.
         """
-        df = df.copy()
-        df['DayOfWeek'] = df['Completion Time'].dt.day_name()
-        df['Hour'] = df['Completion Time'].dt.hour
-        
-        # Order days
+        # Order days (indexed by the parser's 0-6 '_DoW' column, Monday first)
         days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         
-        # Group
-        heatmap_data = df.groupby(['DayOfWeek', 'Hour']).size().reset_index(name='Count')
-        
-        # Pivot for heatmap matrix
-        matrix = heatmap_data.pivot(index='DayOfWeek', columns='Hour', values='Count').fillna(0)
-        matrix = matrix.reindex(days_order)
+        # Count transactions into a fixed 7x24 matrix in one pass (skipping NaT rows)
+        parts = df[['_DoW', '_Hour']].dropna()
+        dow = parts['_DoW'].to_numpy(dtype=np.intp)
+        hour = parts['_Hour'].to_numpy(dtype=np.intp)
+        matrix = np.zeros((7, 24), dtype=np.int32)
+        np.add.at(matrix, (dow, hour), 1)
         
         fig = px.imshow(
             matrix,